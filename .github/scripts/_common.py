@@ -0,0 +1,330 @@
+"""
+Shared helpers for the README update scripts: fetching recent changes from the
+repository and rendering the recent changes section.
+"""
+
+import os
+import re
+import datetime
+import hashlib
+import heapq
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from urllib.parse import quote
+import requests
+
+# Number of recent files to show per directory
+NUM_FILES = 10
+
+# Number of commits scanned for changes; GraphQL returns at most 100 per page
+NUM_COMMITS = 100
+
+# Number of README files read and rewritten concurrently
+MAX_WORKERS = 16
+
+# Files and directories to exclude (can be extended)
+EXCLUDE_PATTERNS = [
+    r'^\.git.*',
+    r'^\.github.*',
+    r'^LICENSE$',
+    r'^\.gitignore$',
+    r'^_site/.*',    # Jekyll build directory
+    r'^\.sass-cache/.*',  # Jekyll cache directory
+    r'^\.jekyll-cache/.*',  # Jekyll cache directory
+    r'^vendor/.*',   # Jekyll vendor directory
+]
+
+# Define the section markers - compatible with Jekyll
+START_MARKER = "<!-- RECENT_CHANGES_START -->"
+END_MARKER = "<!-- RECENT_CHANGES_END -->"
+
+# Hash of the rendered table, used to skip rewriting unchanged sections
+HASH_MARKER = "<!-- RECENT_CHANGES_HASH:"
+
+# Compiled once at import instead of per file / per README
+_EXCLUDE_RE = re.compile("|".join(f"(?:{p})" for p in EXCLUDE_PATTERNS))
+_SECTION_RE = re.compile(f"{re.escape(START_MARKER)}.*?{re.escape(END_MARKER)}", re.DOTALL)
+_POST_RE = re.compile(r'_posts/(\d{4}-\d{2}-\d{2})-(.*?)\.md')
+_HASH_RE = re.compile(f"{re.escape(HASH_MARKER)}\\s*([0-9a-f]+)")
+
+GITHUB_API_URL = "https://api.github.com"
+GRAPHQL_URL = f"{GITHUB_API_URL}/graphql"
+
+# Concurrent per-commit REST requests; matches the session's default connection pool size
+REST_WORKERS = 10
+
+# Last NUM_COMMITS commits on the default branch, fetched as a single page
+HISTORY_QUERY = """
+query($owner: String!, $name: String!, $count: Int!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      name
+      target {
+        ... on Commit {
+          history(first: $count) {
+            nodes {
+              oid
+              committedDate
+              messageHeadline
+              author { name }
+              url
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+def should_exclude(path):
+    """Check if the file path should be excluded."""
+    return _EXCLUDE_RE.match(path) is not None
+
+def _precompute(file_path):
+    """Parse the parts of a changed file's path that every README row needs."""
+    file_name = os.path.basename(file_path)
+    file_ext = os.path.splitext(file_name)[1]
+    
+    # Escape the path once for use in markdown links
+    escaped = quote(file_path, safe='/')
+    
+    # Create Jekyll-compatible URLs (use site.baseurl if needed)
+    jekyll_name = file_name
+    if file_path.startswith('_posts/'):
+        # Extract date and slug from post filename
+        post_match = _POST_RE.match(file_path)
+        if post_match:
+            date_part, slug = post_match.groups()
+            jekyll_link = f"/blog/{slug}"
+            jekyll_name = f"{date_part}: {slug.replace('-', ' ')}"
+        else:
+            jekyll_link = f"/{escaped.replace('.md', '/')}"
+    elif file_ext in ['.md', '.markdown'] and not file_path.endswith('README.md'):
+        # Convert .md files to their Jekyll URL equivalent
+        jekyll_link = f"/{escaped.replace('.md', '/').replace('.markdown', '/')}"
+    else:
+        # For other files, use direct path
+        jekyll_link = f"/{escaped}"
+    
+    # Handle the special case of README.md files when in Jekyll
+    if file_name.lower() == 'readme.md':
+        jekyll_name = os.path.basename(os.path.dirname(file_path) or "Main")
+    
+    return {
+        'basename': file_name,
+        'escaped': escaped,
+        'jekyll_name': jekyll_name,
+        'jekyll_link': jekyll_link,
+    }
+
+def _build_dir_index(all_file_updates):
+    """Bucket updated files under every directory that contains them, newest first."""
+    dir_index = {}
+    for file_path, info in all_file_updates.items():
+        # The root bucket ('') holds every file, then one bucket per ancestor directory
+        parts = file_path.split('/')[:-1]
+        for directory in ('', *accumulate(parts, lambda a, b: f"{a}/{b}")):
+            dir_index.setdefault(directory, []).append((file_path, info))
+    
+    # Keep one spare entry so a README dropping itself still fills NUM_FILES rows
+    for directory, files in dir_index.items():
+        dir_index[directory] = heapq.nlargest(NUM_FILES + 1, files, key=lambda x: x[1]['date'])
+    
+    return dir_index
+
+def get_directory_changes(readme_path, dir_index):
+    """Get recently updated files in the README's own directory and its subdirectories."""
+    # Index keys are directories, so look up the README's directory rather than its path
+    readme_dir = os.path.dirname(readme_path)
+    candidates = dir_index.get(readme_dir, [])
+    # Skip the README itself from showing up in its own changes list
+    return [item for item in candidates if item[0] != readme_path][:NUM_FILES]
+
+def _github_session(token):
+    """Create a session so every API request reuses one keep-alive connection."""
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f"bearer {token}",
+        'Accept': 'application/vnd.github+json',
+    })
+    return session
+
+def _fetch_via_graphql(session, repo_name):
+    """Fetch the default branch and its last NUM_COMMITS commits in a single GraphQL query."""
+    owner, name = repo_name.split('/', 1)
+    response = session.post(
+        GRAPHQL_URL,
+        json={
+            'query': HISTORY_QUERY,
+            'variables': {'owner': owner, 'name': name, 'count': NUM_COMMITS},
+        },
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get('errors'):
+        raise RuntimeError(f"GraphQL query failed: {payload['errors']}")
+    
+    branch = payload['data']['repository']['defaultBranchRef']
+    return branch['name'], branch['target']['history']['nodes']
+
+def _get_shallow_commits():
+    """Return the boundary commits of a shallow clone, whose parents are missing locally."""
+    result = subprocess.run(
+        ['git', 'rev-parse', '--git-path', 'shallow'],
+        capture_output=True, text=True, check=True,
+    )
+    try:
+        with open(result.stdout.strip(), 'r', encoding='utf-8') as file:
+            return set(file.read().split())
+    except FileNotFoundError:
+        return set()
+
+def _get_commit_files(ref):
+    """Map the last NUM_COMMITS commits on ref to the files they touched, using the local checkout."""
+    # Each record starts with a NUL so commit hashes can't be confused with file names
+    result = subprocess.run(
+        ['git', '-c', 'core.quotePath=off', 'log', '-n', str(NUM_COMMITS), '--name-only',
+         '--pretty=format:%x00%H', ref],
+        capture_output=True, text=True, check=True,
+    )
+    
+    commit_files = {}
+    for record in result.stdout.split('\0'):
+        lines = record.splitlines()
+        if not lines:
+            continue
+        commit_files[lines[0]] = [line for line in lines[1:] if line]
+    
+    # git log lists every tracked file for a shallow boundary commit, so treat those as missing
+    for oid in _get_shallow_commits():
+        commit_files.pop(oid, None)
+    
+    return commit_files
+
+def _get_commit_files_via_rest(session, repo_name, oids):
+    """Map commits to the files they touched with the REST API, for commits missing locally."""
+    def files_for(oid):
+        response = session.get(f"{GITHUB_API_URL}/repos/{repo_name}/commits/{oid}")
+        response.raise_for_status()
+        return oid, [file['filename'] for file in response.json().get('files', [])]
+    
+    with ThreadPoolExecutor(max_workers=REST_WORKERS) as executor:
+        return dict(executor.map(files_for, oids))
+
+def get_repo_changes(repo_name):
+    """Get all recently updated files from the repository."""
+    token = os.environ.get('GITHUB_TOKEN')
+    
+    session = _github_session(token)
+    
+    # One GraphQL round-trip for the commit metadata, one local git call for the file lists
+    default_branch, commits = _fetch_via_graphql(session, repo_name)
+    try:
+        commit_files = _get_commit_files(f"origin/{default_branch}")
+    except (OSError, subprocess.CalledProcessError):
+        commit_files = {}
+    
+    # Commits absent from the checkout or cut off by a shallow clone are fetched over REST
+    missing = [commit['oid'] for commit in commits if commit['oid'] not in commit_files]
+    if missing:
+        commit_files.update(_get_commit_files_via_rest(session, repo_name, missing))
+    
+    # Track files and their last modification date
+    file_updates = {}
+    
+    # Process up to the last NUM_COMMITS commits to find recent changes
+    for commit in commits:
+        # Commit-level details are shared by every file the commit touched
+        author = commit['author']
+        message = commit['messageHeadline']
+        commit_info = {
+            'date': datetime.datetime.fromisoformat(commit['committedDate'].replace('Z', '+00:00')),
+            # Truncate long commit messages once here rather than per README row
+            'commit_message': message if len(message) <= 60 else message[:57] + "...",
+            'commit_url': commit['url'],
+            'author': author['name'] if author else 'Unknown'
+        }
+        commit_date = commit_info['date']
+        
+        # For each file modified in this commit
+        for file_path in commit_files.get(commit['oid'], []):
+            # Skip excluded files
+            if should_exclude(file_path):
+                continue
+                
+            # Only track the most recent update for each file
+            if file_path not in file_updates or commit_date > file_updates[file_path]['date']:
+                file_updates[file_path] = commit_info
+    
+    return file_updates
+
+@lru_cache(maxsize=None)
+def _fetch_updates(repo_name, sha):
+    """Fetch and index the recent changes for one repository state."""
+    all_file_updates = get_repo_changes(repo_name)
+    dir_index = _build_dir_index(all_file_updates)
+    file_meta = {file_path: _precompute(file_path) for file_path in all_file_updates}
+    return all_file_updates, dir_index, file_meta
+
+def fetch_updates():
+    """Get the recent changes for the current repository, fetched at most once per run."""
+    return _fetch_updates(os.environ.get('GITHUB_REPOSITORY'), os.environ.get('GITHUB_SHA'))
+
+def render_table(recent_files, link_for):
+    """Render the recent changes table; link_for maps a changed file to its (name, link)."""
+    rows = []
+    if recent_files:
+        rows.append("| File | Last Updated | Author | Commit Message |\n")
+        rows.append("| ---- | ------------ | ------ | -------------- |\n")
+        
+        for file_path, info in recent_files:
+            date_str = info['date'].strftime("%Y-%m-%d")
+            file_name, file_link = link_for(file_path)
+            rows.append(f"| [{file_name}]({file_link}) | {date_str} | {info['author']} | [{info['commit_message']}]({info['commit_url']}) |\n")
+    else:
+        rows.append("*No recent changes found in this directory*\n")
+    
+    return "".join(rows)
+
+def render_recent_changes(table, table_hash):
+    """Wrap a rendered table in the marked recent changes section."""
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    return "".join([
+        f"{START_MARKER}\n",
+        f"{HASH_MARKER} {table_hash} -->\n",
+        "## Recently Updated Files\n\n",
+        f"*Last updated: {current_time}*\n\n",
+        table,
+        f"\n{END_MARKER}",
+    ])
+
+def write_section(file_path, content, table, num_changes):
+    """Replace or append the recent changes section of a file and write it back."""
+    # Leave the file untouched when the listed changes are the same as last run
+    table_hash = hashlib.sha1(table.encode('utf-8')).hexdigest()[:12]
+    existing_section = _SECTION_RE.search(content)
+    if existing_section:
+        hash_match = _HASH_RE.search(existing_section.group(0))
+        if hash_match and hash_match.group(1) == table_hash:
+            print(f"Skipped {file_path}, recent changes are unchanged.")
+            return
+    
+    recent_changes_content = render_recent_changes(table, table_hash)
+    
+    # Check if the section markers already exist in the file
+    if START_MARKER in content and END_MARKER in content:
+        # Replace the existing section
+        new_content = _SECTION_RE.sub(lambda _: recent_changes_content, content)
+    else:
+        # Append the section to the end of the file
+        new_content = content + "\n\n" + recent_changes_content
+    
+    # Write the updated content back to the file
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(new_content)
+    
+    print(f"Updated {file_path} with {num_changes} recent changes.")